@@ -0,0 +1,29 @@
+"""Optional numba-compiled kernels.
+
+numba is a heavyweight optional accelerator, deliberately not part of
+requirements.txt; when it is missing the exported kernels are None and
+callers fall back to their NumPy implementations.
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+
+    @njit(cache=True, fastmath=True, parallel=True)
+    def dist2_kernel(A, B):
+        """Squared distances between paired rows of two (N,3) arrays.
+
+        Fuses the subtract/square/sum into one compiled sweep with no
+        intermediate arrays; the argmin-with-index reduction stays with
+        the caller since prange only supports independent writes.
+        """
+        n = A.shape[0]
+        out = np.empty(n)
+        for i in prange(n):
+            dx = A[i, 0] - B[i, 0]
+            dy = A[i, 1] - B[i, 1]
+            dz = A[i, 2] - B[i, 2]
+            out[i] = dx*dx + dy*dy + dz*dz
+        return out
+except ImportError:
+    dist2_kernel = None
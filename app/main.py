@@ -1,11 +1,15 @@
-from fastapi import FastAPI, Body
+from fastapi import FastAPI, Body, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
-from app.model import predict_safe_path
+from app.model import predict_safe_path, predict_safe_path_batch
 
-app = FastAPI(title="AI Path Trajectory Predictor", version="0.3.0")
+app = FastAPI(title="AI Path Trajectory Predictor", version="0.3.0",
+              default_response_class=ORJSONResponse)
 
 # Enable CORS for all origins (adjust for production)
 app.add_middleware(
@@ -15,21 +19,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Float-text JSON paths compress 5-10x; level 5 keeps CPU cost negligible
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Expected bad input is reported via status tuples in app.model; anything
+# that still raises (e.g. from the sgp4 C core) surfaces here as a 500.
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception):
+    return ORJSONResponse({"error": str(exc)}, status_code=500)
+
 class PredictRequest(BaseModel):
     satellite_tle: str
     debris_tle: str
     horizon_minutes: Optional[int] = 60
     step_seconds: Optional[int] = 30
 
+class TLEPair(BaseModel):
+    satellite_tle: str
+    debris_tle: str
+
+class BatchPredictRequest(BaseModel):
+    pairs: List[TLEPair]
+    horizon_minutes: Optional[int] = 60
+    step_seconds: Optional[int] = 30
+
 @app.get("/")
 def root():
     return {"status": "ok", "service": "ai-path-trajectory-predictor", "post": "/predict"}
 
 @app.post("/predict")
-def predict(req: PredictRequest = Body(...)):
-    return predict_safe_path(
+async def predict(req: PredictRequest = Body(...)):
+    # CPU-bound work goes to the threadpool so the event loop keeps
+    # multiplexing connections; sgp4's C core releases the GIL, so a
+    # threadpool (rather than a process pool) is enough here.
+    result = await run_in_threadpool(
+        predict_safe_path,
         satellite_tle=req.satellite_tle,
         debris_tle=req.debris_tle,
         horizon_minutes=req.horizon_minutes,
         step_seconds=req.step_seconds
     )
+    # Return ORJSONResponse directly so orjson serializes the NumPy path
+    # arrays in C instead of round-tripping them through jsonable_encoder.
+    return ORJSONResponse(result)
+
+@app.post("/predict_batch")
+async def predict_batch(req: BatchPredictRequest = Body(...)):
+    results = await run_in_threadpool(
+        predict_safe_path_batch,
+        [(p.satellite_tle, p.debris_tle) for p in req.pairs],
+        horizon_minutes=req.horizon_minutes,
+        step_seconds=req.step_seconds
+    )
+    return ORJSONResponse({"results": results})
@@ -1,34 +1,92 @@
 import math
-import re
+import os
+import threading
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import List, Tuple, Dict, Any
-from sgp4.api import Satrec, jday
+from functools import lru_cache
+from typing import List, Tuple, Dict, Any, Union
+
+import numpy as np
+from sgp4.api import Satrec, SatrecArray, jday
+
+from app._fast import dist2_kernel as _dist2_kernel
 
 # -------------------------------
 # Thresholds
 # -------------------------------
 LEO_CA_THRESHOLD_KM = 5.0
 GEO_CA_THRESHOLD_KM = 25.0
+# Altitude-shell gap (with safety factor) above which the closest-approach
+# scan can be skipped outright.
+CA_EARLY_EXIT_GAP_KM = GEO_CA_THRESHOLD_KM * 10
+# Above this many samples the closest-approach search goes coarse-then-fine
+CA_COARSE_MIN_N = 2048
+CA_COARSE_STRIDE = 16
 
 # -------------------------------
 # Helpers
 # -------------------------------
 
-_TLE_PAIR_REGEX = re.compile(r"(1\s+\d{5}[U ]\s.*?)(2\s+\d{5}\s.*)", flags=re.IGNORECASE | re.DOTALL)
+def _scan_tle_line(raw: str, lead: str, start: int = 0) -> int:
+    """Find `lead` ('1 ' or '2 ') at a word boundary followed by a 5-digit catalog number."""
+    i = raw.find(lead, start)
+    while i != -1:
+        if (i == 0 or raw[i-1].isspace()) and raw[i+2:i+7].isdigit():
+            return i
+        i = raw.find(lead, i + 1)
+    return -1
 
-def sanitize_vector(vec: List[float]) -> List[float]:
-    return [0.0 if math.isinf(x) or math.isnan(x) else x for x in vec]
+# Maps each byte to its checksum contribution: digits to their value,
+# '-' to 1, everything else to 0.
+_CKSUM_TBL = bytes((i - 0x30) if 0x30 <= i <= 0x39 else (1 if i == 0x2D else 0) for i in range(256))
 
-def normalize_tle_block(tle_text: str) -> Tuple[str, str, str]:
+# How many initialized Satrec objects to keep; override for catalog-scale use
+MAX_TLE_CACHE = int(os.environ.get("MAX_TLE_CACHE", "4096"))
+
+@lru_cache(maxsize=MAX_TLE_CACHE)
+def _get_satrec(l1: str, l2: str) -> Satrec:
+    """Memoized twoline2rv: SGP4 init is pure per (L1, L2), so reuse is safe."""
+    return Satrec.twoline2rv(l1, l2)
+
+_tls = threading.local()
+
+def _grid_buffers(total_s: int, step_s: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Thread-local (ks, jd, fr) buffers keyed by grid shape, reused across requests.
+
+    ks is the read-only second-offset grid; jd and fr are scratch arrays the
+    caller fills in place, avoiding three fresh allocations per request.
+    """
+    key = (total_s, step_s)
+    if getattr(_tls, "grid_key", None) != key:
+        ks = np.arange(0, total_s + 1, step_s, dtype=np.float64)
+        _tls.grid_key = key
+        _tls.ks = ks
+        _tls.jd = np.empty_like(ks)
+        _tls.fr = np.empty_like(ks)
+    return _tls.ks, _tls.jd, _tls.fr
+
+def try_normalize_tle_block(tle_text: str):
+    """Non-raising normalize: (name, L1, L2) or None when no TLE is found."""
     lines = [ln.strip() for ln in tle_text.strip().splitlines() if ln.strip()]
-    if len(lines) >= 3 and lines[1].startswith("1 ") and lines[2].startswith("2 "):
-        return lines[0], lines[1], lines[2]
-    if len(lines) >= 2 and lines[0].startswith("1 ") and lines[1].startswith("2 "):
-        return "UNKNOWN", lines[0], lines[1]
-    m = _TLE_PAIR_REGEX.search(tle_text.replace("\n", " "))
-    if m:
-        return "UNKNOWN", m.group(1).strip(), m.group(2).strip()
-    raise ValueError("Invalid TLE format")
+    # The line pair may sit at any index; the line before it, if any, is the name
+    for i, ln in enumerate(lines):
+        if ln.startswith("1 ") and i + 1 < len(lines) and lines[i+1].startswith("2 "):
+            return (lines[i-1] if i > 0 else "UNKNOWN"), ln, lines[i+1]
+    # Fallback for TLEs mashed onto one line: a single forward scan, no
+    # regex backtracking and no whole-buffer replace() copy.
+    raw = tle_text.strip()
+    i1 = _scan_tle_line(raw, "1 ")
+    if i1 != -1:
+        i2 = _scan_tle_line(raw, "2 ", i1 + 2)
+        if i2 > i1:
+            return "UNKNOWN", raw[i1:i2].strip(), raw[i2:i2+69].strip()
+    return None
+
+def normalize_tle_block(tle_text: str) -> Tuple[str, str, str]:
+    parts = try_normalize_tle_block(tle_text)
+    if parts is None:
+        raise ValueError("Invalid TLE format")
+    return parts
 
 def validate_tle(tle_text: str) -> Tuple[str, str, str]:
     name, L1, L2 = normalize_tle_block(tle_text)
@@ -37,62 +95,216 @@ def validate_tle(tle_text: str) -> Tuple[str, str, str]:
         raise ValueError("TLE lines must start with '1 ' and '2 '")
     return name, L1, L2
 
-def propagate_positions(tle_text: str, minutes: int = 60, step_s: int = 30) -> List[Dict]:
+@dataclass(slots=True)
+class TLE:
+    """A TLE parsed exactly once, with the mean motion extracted eagerly."""
+    name: str
+    l1: str
+    l2: str
+    mean_motion: float
+
+    def text(self) -> str:
+        return f"{self.name}\n{self.l1}\n{self.l2}"
+
+def try_parse_tle(tle_text: str) -> Tuple[bool, Union[TLE, str]]:
+    """Parse without raising on expected bad input: (True, TLE) or (False, reason)."""
+    parts = try_normalize_tle_block(tle_text)
+    if parts is None:
+        return False, "Invalid TLE format"
+    name, L1, L2 = parts
+    if not (L1.startswith("1 ") and L2.startswith("2 ")):
+        return False, "TLE lines must start with '1 ' and '2 '"
     try:
-        _, L1, L2 = normalize_tle_block(tle_text)
-        sat = Satrec.twoline2rv(L1, L2)
+        mm = float(L2[52:63])
+    except ValueError:
+        mm = float("nan")
+    return True, TLE(name, L1, L2, mm)
+
+def parse_tle(tle_text: str) -> TLE:
+    ok, result = try_parse_tle(tle_text)
+    if not ok:
+        raise ValueError(result)
+    return result
+
+def propagate_positions_soa(
+    tle: Union[str, TLE], minutes: int = 60, step_s: int = 30,
+    need_velocity: bool = False, need_timestamps: bool = False
+) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """Propagate a TLE and return SoA arrays: (N,3) positions, (N,3) velocities, timestamps.
+
+    Velocities and ISO timestamps are skipped by default — only the dict API
+    needs them, and building N strings per call costs more than the SGP4 sweep.
+    """
+    try:
+        if isinstance(tle, TLE):
+            L1, L2 = tle.l1, tle.l2
+        else:
+            _, L1, L2 = normalize_tle_block(tle)
+        sat = _get_satrec(L1, L2)
     except Exception:
-        return []
+        return np.empty((0, 3)), np.empty((0, 3)), []
     t0 = datetime.utcnow()
-    out = []
-    for k in range(0, minutes*60 + 1, step_s):
-        t = t0 + timedelta(seconds=k)
-        jd, fr = jday(t.year, t.month, t.day, t.hour, t.minute, t.second + t.microsecond/1e6)
-        e, r, v = sat.sgp4(jd, fr)
-        if e == 0:
-            out.append({"t": t.isoformat()+"Z", "r": sanitize_vector(r), "v": sanitize_vector(v)})
-    return out
+    ks, jd, fr = _grid_buffers(minutes*60, step_s)
+    jd0, fr0 = jday(t0.year, t0.month, t0.day, t0.hour, t0.minute, t0.second + t0.microsecond/1e6)
+    np.multiply(ks, 1.0/86400.0, out=fr)
+    fr += fr0
+    np.floor(fr, out=jd)
+    fr -= jd
+    jd += jd0
+    e, r, v = sat.sgp4_array(jd, fr)
+    good = e == 0
+    R = np.nan_to_num(r[good], nan=0.0, posinf=0.0, neginf=0.0)
+    V = np.nan_to_num(v[good], nan=0.0, posinf=0.0, neginf=0.0) if need_velocity else np.empty((0, 3))
+    ts: List[str] = []
+    if need_timestamps:
+        # One vectorized datetime64 add + format instead of N datetime objects
+        stamps = np.datetime64(t0, "us") + (ks[good] * 1_000_000).astype("timedelta64[us]")
+        ts = [s + "Z" for s in np.datetime_as_string(stamps, unit="us")]
+    return R, V, ts
+
+def propagate_pair(tle_a: Union[str, TLE], tle_b: Union[str, TLE], minutes: int = 60, step_s: int = 30) -> Tuple[np.ndarray, np.ndarray, datetime, np.ndarray]:
+    """Propagate two TLEs over a shared time grid in one fused SatrecArray call.
+
+    Returns (positions_a, positions_b, epoch, second_offsets); timestamps are
+    not formatted here — callers build an ISO string only for the index they
+    care about.
+    """
+    t0 = datetime.utcnow()
+    try:
+        if isinstance(tle_a, TLE):
+            a1, a2 = tle_a.l1, tle_a.l2
+        else:
+            _, a1, a2 = normalize_tle_block(tle_a)
+        sat_a = _get_satrec(a1, a2)
+    except Exception:
+        sat_a = None
+    try:
+        if isinstance(tle_b, TLE):
+            b1, b2 = tle_b.l1, tle_b.l2
+        else:
+            _, b1, b2 = normalize_tle_block(tle_b)
+        sat_b = _get_satrec(b1, b2)
+    except Exception:
+        sat_b = None
+    if sat_a is None or sat_b is None:
+        # One side failed to parse; propagate whatever is left individually.
+        # No closest approach exists, so no offsets are needed.
+        Ra, _, _ = propagate_positions_soa(tle_a, minutes=minutes, step_s=step_s)
+        Rb, _, _ = propagate_positions_soa(tle_b, minutes=minutes, step_s=step_s)
+        return Ra, Rb, t0, np.empty(0)
+    ks, jd, fr = _grid_buffers(minutes*60, step_s)
+    jd0, fr0 = jday(t0.year, t0.month, t0.day, t0.hour, t0.minute, t0.second + t0.microsecond/1e6)
+    np.multiply(ks, 1.0/86400.0, out=fr)
+    fr += fr0
+    np.floor(fr, out=jd)
+    fr -= jd
+    jd += jd0
+    arr = SatrecArray([sat_a, sat_b])
+    e, r, v = arr.sgp4(jd, fr)
+    good = (e[0] == 0) & (e[1] == 0)
+    r = np.nan_to_num(r[:, good], nan=0.0, posinf=0.0, neginf=0.0)
+    # orjson's numpy serializer requires C-contiguous arrays
+    return np.ascontiguousarray(r[0]), np.ascontiguousarray(r[1]), t0, ks[good]
+
+def propagate_positions(tle_text: str, minutes: int = 60, step_s: int = 30) -> List[Dict]:
+    R, V, ts = propagate_positions_soa(tle_text, minutes=minutes, step_s=step_s,
+                                       need_velocity=True, need_timestamps=True)
+    return [{"t": ts[i], "r": R[i].tolist(), "v": V[i].tolist()} for i in range(len(ts))]
+
+def _pairwise_d2(A: np.ndarray, B: np.ndarray) -> np.ndarray:
+    """Squared distances between paired rows, via the numba kernel when present."""
+    if _dist2_kernel is not None:
+        return _dist2_kernel(A, B)
+    diff = A - B
+    return np.einsum("ij,ij->i", diff, diff)
+
+def nearest_approach_arrays(A: np.ndarray, B: np.ndarray) -> Tuple[float, int, float, bool]:
+    """Closest approach between two (N,3) position arrays.
+
+    Returns (distance_km, index, delta, early_exit). delta in [-0.5, 0.5] is
+    the sub-step offset of the parabola fitted through the squared distances
+    around the grid minimum, in step units. When early_exit is True the scan
+    was skipped and distance_km is a radial-gap lower bound, not the measured
+    minimum.
+    """
+    n = min(len(A), len(B))
+    if n == 0:
+        return float("inf"), -1, 0.0, False
+    # Disjoint altitude shells (e.g. LEO vs GEO): the radial gap lower-bounds
+    # every pairwise distance, so skip the per-sample scan entirely.
+    na = np.linalg.norm(A[:n], axis=1)
+    nb = np.linalg.norm(B[:n], axis=1)
+    gap = max(float(na.min() - nb.max()), float(nb.min() - na.max()), 0.0)
+    if gap > CA_EARLY_EXIT_GAP_KM:
+        return gap, -1, 0.0, True
+    # For long propagations, find the approximate minimum on a strided
+    # subsample and re-scan only a +/- stride window around it; a window
+    # minimum sitting on the window edge means the coarse pick was an
+    # artifact, in which case fall back to the full scan.
+    base = 0
+    if n >= CA_COARSE_MIN_N:
+        stride = CA_COARSE_STRIDE
+        kc = int(_pairwise_d2(A[:n:stride], B[:n:stride]).argmin()) * stride
+        lo = max(0, kc - stride)
+        hi = min(n, kc + stride + 1)
+        d2 = _pairwise_d2(A[lo:hi], B[lo:hi])
+        kw = int(d2.argmin())
+        if (kw == 0 and lo > 0) or (kw == hi - lo - 1 and hi < n):
+            d2 = _pairwise_d2(A[:n], B[:n])
+        else:
+            base = lo
+    else:
+        d2 = _pairwise_d2(A[:n], B[:n])
+    j = int(d2.argmin())
+    k = base + j
+    d2_min = float(d2[j])
+    delta = 0.0
+    if 0 < j < len(d2) - 1:
+        y0, y1, y2 = float(d2[j-1]), float(d2[j]), float(d2[j+1])
+        denom = y0 - 2.0*y1 + y2
+        if denom > 0.0:
+            delta = 0.5 * (y0 - y2) / denom
+            delta = max(-0.5, min(0.5, delta))
+            d2_min = max(y1 - 0.25 * (y0 - y2) * delta, 0.0)
+    return float(math.sqrt(d2_min)), k, delta, False
 
 def nearest_approach_km(path_a: List[Dict], path_b: List[Dict]) -> Tuple[float, Dict]:
     n = min(len(path_a), len(path_b))
-    dmin = float("inf")
-    kmin = -1
-    for i in range(n):
-        ax, ay, az = path_a[i]["r"]
-        bx, by, bz = path_b[i]["r"]
-        d = math.sqrt((ax-bx)**2 + (ay-by)**2 + (az-bz)**2)
-        if d < dmin:
-            dmin = d
-            kmin = i
+    A = np.asarray([p["r"] for p in path_a[:n]], dtype=np.float64).reshape(n, 3)
+    B = np.asarray([p["r"] for p in path_b[:n]], dtype=np.float64).reshape(n, 3)
+    dmin, kmin, _, early_exit = nearest_approach_arrays(A, B)
+    if early_exit:
+        return dmin, {"time": None, "early_exit": True}
     meta = {}
     if kmin >= 0:
         meta = {"time": path_a[kmin]["t"], "sat_r": path_a[kmin]["r"], "deb_r": path_b[kmin]["r"], "index": kmin}
     return dmin, meta
 
-def adjust_mean_motion_l2(line2: str, delta_rev_per_day: float) -> str:
+def adjust_mean_motion_l2(line2: str, delta_rev_per_day: float, current_mm: float = None) -> str:
     try:
-        current_mm = float(line2[52:63])
+        if current_mm is None or math.isnan(current_mm):
+            current_mm = float(line2[52:63])
         new_mm = current_mm + delta_rev_per_day
-        new_mm_str = f"{new_mm:11.8f}"
-        line2 = line2[:52] + new_mm_str + line2[63:]
-        if len(line2) < 69:
-            line2 = line2.ljust(68) + "0"
-        # Simple checksum: last digit
-        chk = sum(int(c) if c.isdigit() else 0 for c in line2[:68]) % 10
-        line2 = line2[:68] + str(chk)
-        return line2
+        # Mutate one bytearray in place: columns 53-63 hold the mean motion
+        # and column 69 the checksum, so no intermediate strings are needed.
+        buf = bytearray(line2.encode("ascii", "replace"))
+        if len(buf) < 69:
+            buf.extend(b" " * (69 - len(buf)))
+        buf[52:63] = b"%11.8f" % new_mm
+        buf[68] = 0x30 + sum(buf[:68].translate(_CKSUM_TBL)) % 10
+        return buf.decode("ascii")
     except Exception:
         return line2
 
-def generate_safe_tle(original_tle: str, dv_mps: float) -> str:
+def generate_safe_tle(original_tle: Union[str, TLE], dv_mps: float) -> str:
     try:
-        name, L1, L2 = normalize_tle_block(original_tle)
+        tle = original_tle if isinstance(original_tle, TLE) else parse_tle(original_tle)
         delta_rev_per_day = dv_mps * 0.00005
-        new_L2 = adjust_mean_motion_l2(L2, delta_rev_per_day)
-        name_out = name if name != "UNKNOWN" else "SAFE"
-        return f"{name_out}\n{L1}\n{new_L2}"
+        new_L2 = adjust_mean_motion_l2(tle.l2, delta_rev_per_day, current_mm=tle.mean_motion)
+        name_out = tle.name if tle.name != "UNKNOWN" else "SAFE"
+        return f"{name_out}\n{tle.l1}\n{new_L2}"
     except Exception:
-        return original_tle
+        return original_tle.text() if isinstance(original_tle, TLE) else original_tle
 
 def regime_from_mean_motion(mm_rev_per_day: float) -> str:
     if mm_rev_per_day > 10:
@@ -112,40 +324,41 @@ def predict_safe_path(
 ) -> Dict[str, Any]:
     debug_info = {"errors": []}
 
-    # 1) Validate TLEs
-    try:
-        sat_name, sat_l1, sat_l2 = validate_tle(satellite_tle)
-    except Exception as e:
-        debug_info["errors"].append(f"Satellite TLE invalid: {e}")
-        sat_name, sat_l1, sat_l2 = "UNKNOWN", "", ""
+    # 1) Parse TLEs once into canonical objects; bad input is an expected
+    # outcome here, so no exception machinery on the fast path
+    ok, sat = try_parse_tle(satellite_tle)
+    if not ok:
+        debug_info["errors"].append(f"Satellite TLE invalid: {sat}")
+        sat = TLE("UNKNOWN", "", "", float("nan"))
 
-    try:
-        deb_name, deb_l1, deb_l2 = validate_tle(debris_tle)
-    except Exception as e:
-        debug_info["errors"].append(f"Debris TLE invalid: {e}")
-        deb_name, deb_l1, deb_l2 = "UNKNOWN", "", ""
+    ok, deb = try_parse_tle(debris_tle)
+    if not ok:
+        debug_info["errors"].append(f"Debris TLE invalid: {deb}")
+        deb = TLE("UNKNOWN", "", "", float("nan"))
 
     # 2) Determine regime
-    try:
-        mm_sat = float(sat_l2[52:63])
-        regime = regime_from_mean_motion(mm_sat)
-    except Exception:
+    if math.isnan(sat.mean_motion):
         regime = "UNKNOWN"
         debug_info["errors"].append("Mean motion parsing failed")
+    else:
+        regime = regime_from_mean_motion(sat.mean_motion)
 
     step_s_adj = step_seconds if regime != "GEO" else max(300, step_seconds)
 
-    # 3) Propagate positions
-    sat_path = propagate_positions(f"{sat_name}\n{sat_l1}\n{sat_l2}", minutes=horizon_minutes, step_s=step_s_adj)
-    deb_path = propagate_positions(f"{deb_name}\n{deb_l1}\n{deb_l2}", minutes=horizon_minutes, step_s=step_s_adj)
+    # 3) Propagate both objects over one shared time grid
+    sat_R, deb_R, t0, offsets = propagate_pair(sat, deb, minutes=horizon_minutes, step_s=step_s_adj)
 
-    if not sat_path:
+    if len(sat_R) == 0:
         debug_info["errors"].append("Satellite propagation returned 0 points")
-    if not deb_path:
+    if len(deb_R) == 0:
         debug_info["errors"].append("Debris propagation returned 0 points")
 
     # 4) Closest approach
-    dmin_km, meta = nearest_approach_km(sat_path, deb_path)
+    dmin_km, kmin, delta, early_exit = nearest_approach_arrays(sat_R, deb_R)
+    tca = None
+    if 0 <= kmin < len(offsets):
+        tca_s = float(offsets[kmin]) + delta * step_s_adj
+        tca = (t0 + timedelta(seconds=tca_s)).isoformat() + "Z"
     threshold = LEO_CA_THRESHOLD_KM if regime == "LEO" else GEO_CA_THRESHOLD_KM
     risky = dmin_km <= threshold if dmin_km != float("inf") else False
 
@@ -153,29 +366,111 @@ def predict_safe_path(
     if risky:
         maneuver = {"type": "retrograde_burn", "recommended_dv_mps": 1.0,
                     "note": "Small along-track tweak to desynchronize TCA."}
-        safe_tle = generate_safe_tle(f"{sat_name}\n{sat_l1}\n{sat_l2}", maneuver["recommended_dv_mps"])
+        safe_tle = generate_safe_tle(sat, maneuver["recommended_dv_mps"])
     else:
         maneuver = {"type": "no_action", "recommended_dv_mps": 0.0,
                     "note": "Separation above threshold."}
-        safe_tle = f"{sat_name}\n{sat_l1}\n{sat_l2}"
+        safe_tle = sat.text()
 
     return {
         "risk": {
             "min_distance_km": round(dmin_km, 3) if dmin_km != float("inf") else None,
-            "tca": meta.get("time"),
+            "tca": tca,
             "regime": regime,
             "threshold_km": threshold,
-            "risky": risky
+            "risky": risky,
+            # True when the scan was skipped for disjoint altitude shells;
+            # min_distance_km is then a radial-gap lower bound, not the minimum
+            "early_exit": early_exit
         },
         "maneuver": maneuver,
         "tle_output": {
-            "satellite_tle": f"{sat_name}\n{sat_l1}\n{sat_l2}",
-            "debris_tle": f"{deb_name}\n{deb_l1}\n{deb_l2}",
+            "satellite_tle": sat.text(),
+            "debris_tle": deb.text(),
             "predicted_safe_tle": safe_tle
         },
         "paths": {
-            "satellite_xyz_km": [p["r"] for p in sat_path],
-            "debris_xyz_km": [p["r"] for p in deb_path]
+            "satellite_xyz_km": sat_R,
+            "debris_xyz_km": deb_R
         },
         "debug": debug_info
     }
+
+def predict_safe_path_batch(
+    pairs: List[Tuple[str, str]],
+    horizon_minutes: int = 60,
+    step_seconds: int = 30
+) -> List[Dict[str, Any]]:
+    """Screen many satellite/debris pairs with one fused SatrecArray sweep.
+
+    All pairs share a single time grid, so every TLE is propagated in one C
+    call. Each result carries the same risk/maneuver blocks as
+    predict_safe_path but omits the full paths to keep batch payloads small.
+    """
+    parsed: List[Any] = []
+    rows: List[int] = []  # row of each pair's satellite in the stacked array
+    satrecs = []
+    for sat_text, deb_text in pairs:
+        ok_s, sat = try_parse_tle(sat_text)
+        ok_d, deb = try_parse_tle(deb_text)
+        if not (ok_s and ok_d):
+            parsed.append(sat if not ok_s else deb)
+            rows.append(-1)
+            continue
+        try:
+            sat_rec = _get_satrec(sat.l1, sat.l2)
+            deb_rec = _get_satrec(deb.l1, deb.l2)
+        except Exception as exc:
+            parsed.append(str(exc))
+            rows.append(-1)
+            continue
+        parsed.append((sat, deb))
+        rows.append(len(satrecs))
+        satrecs.append(sat_rec)
+        satrecs.append(deb_rec)
+
+    if satrecs:
+        t0 = datetime.utcnow()
+        ks, jd, fr = _grid_buffers(horizon_minutes*60, step_seconds)
+        jd0, fr0 = jday(t0.year, t0.month, t0.day, t0.hour, t0.minute, t0.second + t0.microsecond/1e6)
+        np.multiply(ks, 1.0/86400.0, out=fr)
+        fr += fr0
+        np.floor(fr, out=jd)
+        fr -= jd
+        jd += jd0
+        e, r, v = SatrecArray(satrecs).sgp4(jd, fr)
+        np.nan_to_num(r, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+
+    results: List[Dict[str, Any]] = []
+    for pair, row in zip(parsed, rows):
+        if row < 0:
+            results.append({"error": f"Invalid TLE pair: {pair}"})
+            continue
+        sat, deb = pair
+        good = (e[row] == 0) & (e[row+1] == 0)
+        dmin_km, kmin, delta, early_exit = nearest_approach_arrays(r[row][good], r[row+1][good])
+        offs = ks[good]
+        regime = "UNKNOWN" if math.isnan(sat.mean_motion) else regime_from_mean_motion(sat.mean_motion)
+        threshold = LEO_CA_THRESHOLD_KM if regime == "LEO" else GEO_CA_THRESHOLD_KM
+        risky = dmin_km <= threshold if dmin_km != float("inf") else False
+        tca = None
+        if 0 <= kmin < len(offs):
+            tca = (t0 + timedelta(seconds=float(offs[kmin]) + delta*step_seconds)).isoformat() + "Z"
+        if risky:
+            maneuver = {"type": "retrograde_burn", "recommended_dv_mps": 1.0,
+                        "note": "Small along-track tweak to desynchronize TCA."}
+        else:
+            maneuver = {"type": "no_action", "recommended_dv_mps": 0.0,
+                        "note": "Separation above threshold."}
+        results.append({
+            "risk": {
+                "min_distance_km": round(dmin_km, 3) if dmin_km != float("inf") else None,
+                "tca": tca,
+                "regime": regime,
+                "threshold_km": threshold,
+                "risky": risky,
+                "early_exit": early_exit
+            },
+            "maneuver": maneuver
+        })
+    return results
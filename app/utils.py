@@ -1,26 +1,67 @@
 import math
-import re
-from datetime import datetime, timedelta
+import os
+import threading
+from datetime import datetime
+from functools import lru_cache
 from typing import List, Tuple, Dict
-from sgp4.api import Satrec, jday
+
+import numpy as np
+from sgp4.api import Satrec, SatrecArray, jday
+
+from app._fast import dist2_kernel as _dist2_kernel
+
+# Radial gap beyond which two paths cannot come close enough to matter
+CA_EARLY_EXIT_GAP_KM = 250.0
+# Above this many samples the closest-approach search goes coarse-then-fine
+CA_COARSE_MIN_N = 2048
+CA_COARSE_STRIDE = 16
 
 # --- Helpers ---
-_TLE_PAIR_REGEX = re.compile(r"(1\s+\d{5}[U ]\s.*?)(2\s+\d{5}\s.*)", flags=re.IGNORECASE | re.DOTALL)
+def _scan_tle_line(raw: str, lead: str, start: int = 0) -> int:
+    """Find `lead` ('1 ' or '2 ') at a word boundary followed by a 5-digit catalog number."""
+    i = raw.find(lead, start)
+    while i != -1:
+        if (i == 0 or raw[i-1].isspace()) and raw[i+2:i+7].isdigit():
+            return i
+        i = raw.find(lead, i + 1)
+    return -1
+
+# How many initialized Satrec objects to keep; override for catalog-scale use
+MAX_TLE_CACHE = int(os.environ.get("MAX_TLE_CACHE", "4096"))
+
+@lru_cache(maxsize=MAX_TLE_CACHE)
+def _get_satrec(l1: str, l2: str) -> Satrec:
+    """Memoized twoline2rv: SGP4 init is pure per (L1, L2), so reuse is safe."""
+    return Satrec.twoline2rv(l1, l2)
 
-def sanitize_vector(vec: List[float]) -> List[float]:
-    return [0.0 if math.isinf(x) or math.isnan(x) else x for x in vec]
+_tls = threading.local()
+
+def _grid_buffers(total_s: int, step_s: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Thread-local (ks, jd, fr) buffers keyed by grid shape, reused across calls."""
+    key = (total_s, step_s)
+    if getattr(_tls, "grid_key", None) != key:
+        ks = np.arange(0, total_s + 1, step_s, dtype=np.float64)
+        _tls.grid_key = key
+        _tls.ks = ks
+        _tls.jd = np.empty_like(ks)
+        _tls.fr = np.empty_like(ks)
+    return _tls.ks, _tls.jd, _tls.fr
 
 def normalize_tle_block(tle_text: str) -> Tuple[str, str, str]:
     raw = tle_text.strip()
     lines = [ln.strip() for ln in raw.splitlines() if ln.strip()]
-    if len(lines) >= 2 and lines[0].startswith("1 ") and lines[1].startswith("2 "):
-        return "UNKNOWN", lines[0], lines[1]
-    if len(lines) >= 3 and lines[1].startswith("1 ") and lines[2].startswith("2 "):
-        return lines[0], lines[1], lines[2]
-    m = _TLE_PAIR_REGEX.search(raw.replace("\n", " "))
-    if not m:
-        raise ValueError("Invalid TLE format")
-    return "UNKNOWN", m.group(1).strip(), m.group(2).strip()
+    # The line pair may sit at any index; the line before it, if any, is the name
+    for i, ln in enumerate(lines):
+        if ln.startswith("1 ") and i + 1 < len(lines) and lines[i+1].startswith("2 "):
+            return (lines[i-1] if i > 0 else "UNKNOWN"), ln, lines[i+1]
+    # Single-line fallback: forward scan over the raw text, no regex
+    # backtracking and no whole-buffer replace() copy.
+    i1 = _scan_tle_line(raw, "1 ")
+    if i1 != -1:
+        i2 = _scan_tle_line(raw, "2 ", i1 + 2)
+        if i2 > i1:
+            return "UNKNOWN", raw[i1:i2].strip(), raw[i2:i2+69].strip()
+    raise ValueError("Invalid TLE format")
 
 def validate_tle(tle_text: str) -> Tuple[str, str, str]:
     name, L1, L2 = normalize_tle_block(tle_text)
@@ -28,55 +69,148 @@ def validate_tle(tle_text: str) -> Tuple[str, str, str]:
         raise ValueError("Each TLE line must be exactly 69 characters")
     return name, L1, L2
 
+# Maps each byte to its checksum contribution: digits to their value,
+# '-' to 1, everything else to 0.
+_CKSUM_TBL = bytes((i - 0x30) if 0x30 <= i <= 0x39 else (1 if i == 0x2D else 0) for i in range(256))
+
 def tle_checksum(line: str) -> str:
-    s = 0
-    for c in line[:68]:
-        if c.isdigit():
-            s += int(c)
-        elif c == "-":
-            s += 1
-    return str(s % 10)
-
-def replace_col_span(s: str, start: int, end: int, value: str) -> str:
-    start -= 1
-    return s[:start] + value + s[end:]
-
-def adjust_mean_motion_l2(line2: str, delta_rev_per_day: float) -> str:
-    current_mm = float(line2[52:63])
+    return str(sum(line[:68].encode("ascii", "replace").translate(_CKSUM_TBL)) % 10)
+
+def adjust_mean_motion_l2(line2: str, delta_rev_per_day: float, current_mm: float = None) -> str:
+    if current_mm is None or math.isnan(current_mm):
+        current_mm = float(line2[52:63])
     new_mm = current_mm + delta_rev_per_day
-    mm_str = f"{new_mm:11.8f}"
-    l2 = replace_col_span(line2, 53, 63, mm_str)
-    if len(l2) < 69:
-        l2 = l2.ljust(68) + "0"
-    l2 = l2[:68] + tle_checksum(l2)
-    return l2
+    # Mutate one bytearray in place: columns 53-63 hold the mean motion and
+    # column 69 the checksum, so no intermediate strings are needed.
+    buf = bytearray(line2.encode("ascii", "replace"))
+    if len(buf) < 69:
+        buf.extend(b" " * (69 - len(buf)))
+    buf[52:63] = b"%11.8f" % new_mm
+    buf[68] = 0x30 + sum(buf[:68].translate(_CKSUM_TBL)) % 10
+    return buf.decode("ascii")
 
-def propagate_positions(tle_text: str, minutes: int = 60, step_s: int = 30) -> List[Dict]:
+def propagate_positions_soa(
+    tle_text: str, minutes: int = 60, step_s: int = 30,
+    need_velocity: bool = False, need_timestamps: bool = False
+) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """Propagate a TLE into SoA form: (N,3) positions, (N,3) velocities, ISO timestamps.
+
+    Velocities and timestamps are skipped unless requested; closest-approach
+    work only needs positions.
+    """
     _, L1, L2 = normalize_tle_block(tle_text)
-    sat = Satrec.twoline2rv(L1, L2)
+    sat = _get_satrec(L1, L2)
     t0 = datetime.utcnow()
-    out = []
-    for k in range(0, minutes*60 + 1, step_s):
-        t = t0 + timedelta(seconds=k)
-        jd, fr = jday(t.year, t.month, t.day, t.hour, t.minute, t.second + t.microsecond/1e6)
-        e, r, v = sat.sgp4(jd, fr)
-        if e == 0:
-            r = sanitize_vector(r)
-            v = sanitize_vector(v)
-            out.append({"t": t.isoformat()+"Z", "r": r, "v": v})
-    return out
+    ks, jd, fr = _grid_buffers(minutes*60, step_s)
+    jd0, fr0 = jday(t0.year, t0.month, t0.day, t0.hour, t0.minute, t0.second + t0.microsecond/1e6)
+    np.multiply(ks, 1.0/86400.0, out=fr)
+    fr += fr0
+    np.floor(fr, out=jd)
+    fr -= jd
+    jd += jd0
+    e, r, v = sat.sgp4_array(jd, fr)
+    good = e == 0
+    R = np.nan_to_num(r[good], nan=0.0, posinf=0.0, neginf=0.0)
+    V = np.nan_to_num(v[good], nan=0.0, posinf=0.0, neginf=0.0) if need_velocity else np.empty((0, 3))
+    ts: List[str] = []
+    if need_timestamps:
+        # One vectorized datetime64 add + format instead of N datetime objects
+        stamps = np.datetime64(t0, "us") + (ks[good] * 1_000_000).astype("timedelta64[us]")
+        ts = [s + "Z" for s in np.datetime_as_string(stamps, unit="us")]
+    return R, V, ts
+
+def propagate_many(tles: List[str], minutes: int = 60, step_s: int = 30) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Propagate many TLEs over one shared grid in a single SatrecArray call.
+
+    Returns (errors, positions, velocities) with shapes (S,N), (S,N,3) and
+    (S,N,3). Positions and velocities are NaN/Inf-cleaned in place; samples
+    with nonzero error codes are left for the caller to mask, since a joint
+    mask across S satellites would discard good rows.
+    """
+    sats = []
+    for tle_text in tles:
+        _, L1, L2 = normalize_tle_block(tle_text)
+        sats.append(_get_satrec(L1, L2))
+    t0 = datetime.utcnow()
+    ks, jd, fr = _grid_buffers(minutes*60, step_s)
+    jd0, fr0 = jday(t0.year, t0.month, t0.day, t0.hour, t0.minute, t0.second + t0.microsecond/1e6)
+    np.multiply(ks, 1.0/86400.0, out=fr)
+    fr += fr0
+    np.floor(fr, out=jd)
+    fr -= jd
+    jd += jd0
+    e, r, v = SatrecArray(sats).sgp4(jd, fr)
+    np.nan_to_num(r, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    np.nan_to_num(v, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    return e, r, v
+
+def propagate_positions(tle_text: str, minutes: int = 60, step_s: int = 30) -> List[Dict]:
+    R, V, ts = propagate_positions_soa(tle_text, minutes=minutes, step_s=step_s,
+                                       need_velocity=True, need_timestamps=True)
+    return [{"t": ts[i], "r": R[i].tolist(), "v": V[i].tolist()} for i in range(len(ts))]
+
+def _pairwise_d2(A: np.ndarray, B: np.ndarray) -> np.ndarray:
+    """Squared distances between paired rows, via the numba kernel when present."""
+    if _dist2_kernel is not None:
+        return _dist2_kernel(A, B)
+    diff = A - B
+    return np.einsum("ij,ij->i", diff, diff)
+
+def nearest_approach_arrays(A: np.ndarray, B: np.ndarray) -> Tuple[float, int, float, bool]:
+    """Closest approach between two (N,3) position arrays.
+
+    Returns (distance_km, index, delta, early_exit); delta is the sub-step
+    offset of the parabola through the squared distances around the grid
+    minimum, in step units, clamped to [-0.5, 0.5]. When early_exit is True
+    the scan was skipped and distance_km is a radial-gap lower bound, not
+    the measured minimum.
+    """
+    n = min(len(A), len(B))
+    if n == 0:
+        return float("inf"), -1, 0.0, False
+    # Disjoint altitude shells: the radial gap lower-bounds every distance.
+    na = np.linalg.norm(A[:n], axis=1)
+    nb = np.linalg.norm(B[:n], axis=1)
+    gap = max(float(na.min() - nb.max()), float(nb.min() - na.max()), 0.0)
+    if gap > CA_EARLY_EXIT_GAP_KM:
+        return gap, -1, 0.0, True
+    # Long propagations: coarse strided pass, then re-scan a +/- stride
+    # window; a minimum on the window edge means the coarse pick was an
+    # artifact and triggers the full scan.
+    base = 0
+    if n >= CA_COARSE_MIN_N:
+        stride = CA_COARSE_STRIDE
+        kc = int(_pairwise_d2(A[:n:stride], B[:n:stride]).argmin()) * stride
+        lo = max(0, kc - stride)
+        hi = min(n, kc + stride + 1)
+        d2 = _pairwise_d2(A[lo:hi], B[lo:hi])
+        kw = int(d2.argmin())
+        if (kw == 0 and lo > 0) or (kw == hi - lo - 1 and hi < n):
+            d2 = _pairwise_d2(A[:n], B[:n])
+        else:
+            base = lo
+    else:
+        d2 = _pairwise_d2(A[:n], B[:n])
+    j = int(d2.argmin())
+    k = base + j
+    d2_min = float(d2[j])
+    delta = 0.0
+    if 0 < j < len(d2) - 1:
+        y0, y1, y2 = float(d2[j-1]), float(d2[j]), float(d2[j+1])
+        denom = y0 - 2.0*y1 + y2
+        if denom > 0.0:
+            delta = 0.5 * (y0 - y2) / denom
+            delta = max(-0.5, min(0.5, delta))
+            d2_min = max(y1 - 0.25 * (y0 - y2) * delta, 0.0)
+    return float(math.sqrt(d2_min)), k, delta, False
 
 def nearest_approach_km(path_a: List[Dict], path_b: List[Dict]) -> Tuple[float, Dict]:
     n = min(len(path_a), len(path_b))
-    dmin = float("inf")
-    kmin = -1
-    for i in range(n):
-        ax, ay, az = path_a[i]["r"]
-        bx, by, bz = path_b[i]["r"]
-        d = math.sqrt((ax-bx)**2 + (ay-by)**2 + (az-bz)**2)
-        if d < dmin:
-            dmin = d
-            kmin = i
+    A = np.asarray([p["r"] for p in path_a[:n]], dtype=np.float64).reshape(n, 3)
+    B = np.asarray([p["r"] for p in path_b[:n]], dtype=np.float64).reshape(n, 3)
+    dmin, kmin, _, early_exit = nearest_approach_arrays(A, B)
+    if early_exit:
+        return dmin, {"time": None, "early_exit": True}
     meta = {}
     if kmin >= 0:
         meta = {"time": path_a[kmin]["t"], "sat_r": path_a[kmin]["r"], "deb_r": path_b[kmin]["r"], "index": kmin}
@@ -0,0 +1,15 @@
+import os
+
+import uvicorn
+
+if __name__ == "__main__":
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", 8000)),
+        loop="uvloop",
+        http="httptools",
+        workers=os.cpu_count(),
+        timeout_keep_alive=75,
+        backlog=2048,
+    )